@@ -14,15 +14,27 @@ Functions:
 - generate_anonymous_id: Generates unique anonymous identifiers.
 - validate_dicom_file: Validates DICOM file integrity after modification.
 
+Directory walkers (modify_patientids, batch_anonymize_directory, copy_dicoms)
+process files in a process pool; their per-file workers live at module level
+so they can be pickled.
+
 """
 
 import os, pydicom
-import pandas as pd
+import csv
+import gc
+import itertools
+from collections import deque
+import mmap
+import struct
+from pydicom.dataelem import RawDataElement
+from pydicom.datadict import tag_for_keyword
+from pydicom.tag import Tag
+from pydicom.valuerep import validate_value
+from concurrent.futures import ProcessPoolExecutor
 import time
-import numpy as np
 import shutil
 import hashlib
-import random
 from datetime import datetime, timedelta
 import logging
 
@@ -30,6 +42,14 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Skip per-value validation when reading (values are overwritten anyway) and
+# keep DA/DT/TM values as strings rather than converting them to datetimes.
+# Assigning .value validates with the reading mode too, so replacement values
+# are checked explicitly against the writing mode (see _set_value).
+pydicom.config.settings.reading_validation_mode = pydicom.config.IGNORE
+pydicom.config.datetime_conversion = False
+pydicom.config.convert_wrong_length_to_UN = False
+
 # Complete list of DICOM tags to anonymize (following DICOM PS 3.15)
 DICOM_TAGS_TO_ANONYMIZE = [
     # Patient identification
@@ -62,42 +82,161 @@ TAGS_TO_EMPTY = [
     'StudyComments', 'ImageComments', 'RequestedProcedureComments'
 ]
 
-def generate_anonymous_id(prefix='ANON', length=8):
-    """Generate a unique anonymous identifier."""
-    timestamp = datetime.now().strftime('%Y%m%d')
-    random_str = ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=length))
-    return f"{prefix}_{timestamp}_{random_str}"
+_POOL_SIZE = 4096
+
+# One generator for the random dates, times and demographics; integers are drawn in blocks and
+# handed out one at a time so each call avoids per-draw Python overhead.
+# numpy is imported on first use to keep the module import light.
+_rng = None
+_pools = {}
+
+def _generator():
+    """Return the module's numpy Generator, creating it on first use."""
+    global _rng
+    if _rng is None:
+        import numpy as np
+        _rng = np.random.default_rng()
+    return _rng
+
+def _reseed():
+    """Give a forked worker its own stream instead of a copy of the parent's."""
+    global _rng
+    _rng = None
+    _pools.clear()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reseed)
+
+def _randint(high):
+    """Draw an integer in [0, high) from the pre-drawn pool for that range."""
+    pool = _pools.get(high)
+    if not pool:
+        pool = _pools[high] = _generator().integers(0, high, size=_POOL_SIZE).tolist()
+    return pool.pop()
+
+_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+# os.urandom byte -> alphabet character; bytes >= 252 (7 * 36) are dropped so
+# every character is equally likely
+_BYTE_TO_CHAR = bytes(ord(_ALPHABET[b % len(_ALPHABET)]) for b in range(256))
+_REJECTED_BYTES = bytes(range(256 // len(_ALPHABET) * len(_ALPHABET), 256))
+
+def generate_anonymous_ids(prefix='ANON', n=1, length=8, today=None):
+    """
+    Generate n random anonymous identifiers from os.urandom.
+    The random part is cryptographically secure, as identifiers must not be
+    predictable from one another (DICOM PS 3.15). It holds about 41 bits
+    for the default length (36 ** 8); uniqueness is not checked.
+
+    Args:
+    - today: Pre-formatted '%Y%m%d' date (formatted from now if None)
+    """
+    if today is None:
+        today = datetime.now().strftime('%Y%m%d')
+    needed = n * length
+    chars = b''
+    while len(chars) < needed:
+        # ~1.6% of bytes are rejected; draw a little extra up front
+        chars += os.urandom((needed - len(chars)) * 33 // 32 + 8).translate(
+            _BYTE_TO_CHAR, _REJECTED_BYTES)
+    chars = chars[:needed].decode('ascii')
+    return [f"{prefix}_{today}_{chars[i:i + length]}"
+            for i in range(0, needed, length)]
 
-def generate_random_birthdate(age_range=(18, 85)):
-    """Generate a random birthdate within specified age range."""
-    today = datetime.now()
+def generate_anonymous_id(prefix='ANON', length=8, today=None):
+    """Generate a random anonymous identifier (see generate_anonymous_ids)."""
+    return generate_anonymous_ids(prefix, 1, length, today)[0]
+
+def generate_random_birthdate(age_range=(18, 85), now=None):
+    """Generate a random birthdate within specified age range (relative to now)."""
+    today = datetime.now() if now is None else now
     min_birth = today - timedelta(days=age_range[1] * 365.25)
     max_birth = today - timedelta(days=age_range[0] * 365.25)
     random_birth = min_birth + timedelta(
-        days=random.randint(0, (max_birth - min_birth).days)
+        days=_randint((max_birth - min_birth).days + 1)
     )
     return random_birth.strftime('%Y%m%d')
 
-def generate_random_date():
-    """Generate a random date within the last 5 years."""
-    today = datetime.now()
+def generate_random_date(now=None):
+    """Generate a random date within the last 5 years (relative to now)."""
+    today = datetime.now() if now is None else now
     start_date = today - timedelta(days=5 * 365)
     random_date = start_date + timedelta(
-        days=random.randint(0, (today - start_date).days)
+        days=_randint((today - start_date).days + 1)
     )
     return random_date.strftime('%Y%m%d')
 
 def generate_random_time():
     """Generate a random time."""
-    hour = random.randint(0, 23)
-    minute = random.randint(0, 59)
-    second = random.randint(0, 59)
+    minutes, second = divmod(_randint(24 * 60 * 60), 60)
+    hour, minute = divmod(minutes, 60)
     return f"{hour:02d}{minute:02d}{second:02d}"
 
+def generate_random_sex():
+    """Generate a random patient sex."""
+    return 'MFO'[_randint(3)]
+
+def generate_random_age():
+    """Generate a random patient age."""
+    return f"{18 + _randint(85 - 18 + 1)}Y"
+
+_EMPTY = frozenset(TAGS_TO_EMPTY)
+
+def _handler_for(tag):
+    """
+    Classify a tag keyword once.
+
+    Returns:
+    - A callable taking the run's 'now' and producing the replacement value,
+      or None to use the caller's new value.
+    """
+    if tag in _EMPTY:
+        return lambda now: ''
+    if 'Date' in tag:
+        if tag == 'PatientBirthDate':
+            return lambda now: generate_random_birthdate(now=now)
+        return generate_random_date
+    if 'Time' in tag:
+        return lambda now: generate_random_time()
+    if tag == 'PatientSex':
+        return lambda now: generate_random_sex()
+    if tag == 'PatientAge':
+        return lambda now: generate_random_age()
+    return None
+
+# Tag list (as a tuple) -> its _compile_tags result
+_COMPILED_TAGS = {}
+
+def _compile_tags(tags):
+    """
+    Resolve tag keywords to (Tag, keyword, value generator) triples, so the
+    per-file loop looks elements up by integer tag instead of by keyword.
+    Unknown keywords can never be present in a dataset and are dropped.
+    Memoized per distinct tag list.
+
+    Returns:
+    - (list of triples in tag-list order, dict of the triples by Tag)
+    """
+    key = tuple(tags)
+    try:
+        return _COMPILED_TAGS[key]
+    except KeyError:
+        pass
+    compiled = []
+    for keyword in key:
+        itag = tag_for_keyword(keyword)
+        if itag is not None:
+            compiled.append((Tag(itag), keyword, _handler_for(keyword)))
+    result = _COMPILED_TAGS[key] = (compiled, {entry[0]: entry for entry in compiled})
+    return result
+
+# The standard tag list, resolved once at import
+_compile_tags(DICOM_TAGS_TO_ANONYMIZE)
+
 def validate_dicom_file(file_path):
     """Validate DICOM file integrity."""
     try:
-        ds = pydicom.dcmread(file_path)
+        ds = pydicom.dcmread(file_path, stop_before_pixels=True,
+                             specific_tags=['PatientID', 'StudyInstanceUID'])
         # Basic validation
         if not hasattr(ds, 'PatientID') or not hasattr(ds, 'StudyInstanceUID'):
             logger.warning(f"Missing required tags in {file_path}")
@@ -107,67 +246,387 @@ def validate_dicom_file(file_path):
         logger.error(f"Validation failed for {file_path}: {e}")
         return False
 
-def modify_single_dcm(fdcm, tags, newvalue):
+def _iter_dcm_files(root):
+    """
+    Yield paths of .dcm files below root, walking with an os.scandir stack.
+    Unreadable directories are logged and skipped, as os.walk does.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            logger.warning(f"Skipping unreadable directory {directory}: {e}")
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.dcm'):
+                    yield entry.path
+
+GC_INTERVAL = 10000
+_files_since_gc = 0
+
+def _run_chunk(func, chunk):
+    """
+    Apply func to a chunk of tasks, collecting garbage every GC_INTERVAL
+    files (pydicom datasets hold reference cycles that otherwise pile up).
+    """
+    global _files_since_gc
+    results = [func(task) for task in chunk]
+    _files_since_gc += len(chunk)
+    if _files_since_gc >= GC_INTERVAL:
+        gc.collect()
+        _files_since_gc = 0
+    return results
+
+def _parallel_map(func, tasks, chunksize=64):
+    """
+    Lazily apply func to every task, in a process pool when there are more
+    than 4, yielding results in task order.
+
+    tasks may be a generator; only a bounded window of chunks is in flight,
+    so neither the task list nor the results are ever held in full.
+    func must be a module-level function returning plain values (bools,
+    ints, tuples), never pydicom datasets.
+    """
+    tasks = iter(tasks)
+    head = list(itertools.islice(tasks, 5))
+    if len(head) <= 4:
+        yield from _run_chunk(func, head)
+        return
+    tasks = itertools.chain(head, tasks)
+    workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        window = deque()
+        while True:
+            chunk = list(itertools.islice(tasks, chunksize))
+            if chunk:
+                window.append(executor.submit(_run_chunk, func, chunk))
+            if window and (not chunk or len(window) >= 2 * workers):
+                yield from window.popleft().result()
+            elif not chunk:
+                return
+
+# Directories created during the current walker run. Cleared when a walker
+# starts and in forked workers, so a tree removed between runs is recreated.
+_made_dirs = set()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_made_dirs.clear)
+
+def _makedirs_once(directory):
+    """os.makedirs, skipped for directories this run already created."""
+    if directory not in _made_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _made_dirs.add(directory)
+
+def _copy_file(src, dst):
+    """
+    Copy src to dst (with metadata, like shutil.copy2) using an in-kernel
+    os.copy_file_range loop. Falls back to shutil.copy2 where it is not
+    available or the filesystem does not support it.
+    """
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        if remaining > 0:
+            raise OSError(f"Short copy of {src}")
+        shutil.copystat(src, dst)
+    except (AttributeError, OSError):
+        shutil.copy2(src, dst)
+
+def _backup_file(fdcm):
+    """
+    Keep the original file as fdcm + '.backup' before it is overwritten.
+
+    Hardlinks the backup (an O(1) metadata operation); the save that follows
+    replaces fdcm with a new inode, so the backup keeps the original bytes.
+    Falls back to a full copy where hardlinks are not supported.
+    """
+    backup_path = fdcm + '.backup'
+    try:
+        os.link(fdcm, backup_path)
+    except OSError:
+        shutil.copy2(fdcm, backup_path)
+
+def _save_replace(ds, fdcm):
+    """
+    Write ds to a temporary file next to fdcm and atomically rename it over
+    fdcm, keeping fdcm's permission bits (and, where allowed, its owner).
+    """
+    tmp = fdcm + '.tmp'
+    try:
+        # save_as keeps the original transfer syntax and layout
+        # (write_like_original / pydicom 3's default)
+        ds.save_as(tmp)
+        # The rename installs a new inode: carry the old mode over so a
+        # restricted patient file doesn't become world-readable
+        shutil.copymode(fdcm, tmp)
+        st = os.stat(fdcm)
+        try:
+            os.chown(tmp, st.st_uid, st.st_gid)
+        except (AttributeError, OSError):
+            pass
+        os.replace(tmp, fdcm)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+# Value representations stored as plain (padded) character strings
+TEXT_VRS = {'AE', 'AS', 'CS', 'DA', 'DS', 'DT', 'IS', 'LO', 'LT', 'PN',
+            'SH', 'ST', 'TM', 'UC', 'UR', 'UT'}
+
+def _encode_patch(raw, old_value, elem):
+    """
+    Encode elem's new value as a same-length overwrite of its original bytes.
+
+    Args:
+    - raw: Element as read from the file, before it was modified.
+    - old_value: Value before modification.
+    - elem: Modified data element.
+
+    Returns:
+    - (offset, bytes) to write into the file, or None if the new value
+      cannot replace the old one in place.
+    """
+    new_text = '' if elem.value is None else str(elem.value)
+    if not isinstance(raw, RawDataElement):
+        # pydicom already decoded it (e.g. a zero-length value), so the
+        # original length is unknown; only "empty stays empty" is safe
+        return (0, b'') if not new_text and not old_value else None
+    if elem.VR not in TEXT_VRS or raw.value_tell is None:
+        return None
+    try:
+        encoded = new_text.encode('ascii')
+    except UnicodeEncodeError:
+        return None
+    if len(encoded) > raw.length:
+        return None
+    # Trailing spaces are valid DICOM padding and stripped on read
+    return raw.value_tell, encoded.ljust(raw.length, b' ')
+
+def _patch_in_place(fdcm, patches):
+    """Overwrite (offset, bytes) patches in fdcm through a memory map."""
+    with open(fdcm, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mm:
+        for offset, value in patches:
+            mm[offset:offset + len(value)] = value
+        mm.flush()
+
+def modify_single_dcm(fdcm, tags, newvalue, backup=False, original=None, now=None):
     """
     Safely modifies specified tags in a single DICOM file.
+    The file is read (and validated) once.
 
     Args:
     - fdcm: File path of the DICOM file.
     - tags: List of tags to be modified.
     - newvalue: New value to be assigned to the tags.
+    - backup: Keep the original as <file>.backup before saving.
+    - original: Optional dict, filled with the old value of every modified tag.
+    - now: Reference time for generated dates (datetime.now() if None).
 
     Returns:
     - bool: Success status
     """
     try:
+        if now is None:
+            now = datetime.now()
         ds = pydicom.dcmread(fdcm)
+        
+        # Basic validation ('in' keeps the raw elements undecoded for patching)
+        if 'PatientID' not in ds or 'StudyInstanceUID' not in ds:
+            logger.warning(f"Missing required tags, skipping invalid DICOM file: {fdcm}")
+            return False
+        
         modified = False
+        patches = []
+        debug = logger.isEnabledFor(logging.DEBUG)
         
-        for tag in tags:
-            if tag in ds:
-                old_value = ds[tag].value
-                try:
-                    # Handle different tag types appropriately
-                    if tag in TAGS_TO_EMPTY:
-                        ds[tag].value = ''
-                    elif 'Date' in tag:
-                        if tag == 'PatientBirthDate':
-                            ds[tag].value = generate_random_birthdate()
-                        else:
-                            ds[tag].value = generate_random_date()
-                    elif 'Time' in tag:
-                        ds[tag].value = generate_random_time()
-                    elif tag == 'PatientSex':
-                        ds[tag].value = random.choice(['M', 'F', 'O'])
-                    elif tag == 'PatientAge':
-                        ds[tag].value = f"{random.randint(18, 85)}Y"
-                    else:
-                        ds[tag].value = newvalue
-                    
-                    modified = True
-                    logger.debug(f"Modified {tag}: {old_value} -> {ds[tag].value}")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to modify tag {tag} in {fdcm}: {e}")
-                    continue
+        # Only the candidate tags the file actually has: one set
+        # intersection of integer tags instead of a membership test per tag
+        _, by_tag = _compile_tags(tags)
+        for itag in sorted(by_tag.keys() & ds.keys()):
+            _, tag, handler = by_tag[itag]
+            raw = ds.get_item(itag)
+            elem = ds[itag]
+            old_value = elem.value
+            try:
+                # Handle different tag types appropriately
+                _set_value(elem, handler(now) if handler else newvalue)
+                
+                modified = True
+                if original is not None:
+                    original[tag] = old_value
+                patches.append(_encode_patch(raw, old_value, elem))
+                if debug:
+                    logger.debug("Modified %s: %s -> %s", tag, old_value, elem.value)
+                
+            except Exception as e:
+                logger.error(f"Failed to modify tag {tag} in {fdcm}: {e}")
+                continue
         
         if modified:
-            # Create backup before saving
-            backup_path = fdcm + '.backup'
-            shutil.copy2(fdcm, backup_path)
-            
-            ds.save_as(fdcm)
-            logger.info(f"Successfully anonymized {fdcm}")
+            transfer_syntax = ds.file_meta.get('TransferSyntaxUID')
+            if (not backup and None not in patches
+                    and transfer_syntax != pydicom.uid.DeflatedExplicitVRLittleEndian):
+                # Every new value fits its original slot: overwrite those
+                # bytes and leave the rest of the file (pixel data) alone
+                _patch_in_place(fdcm, patches)
+            else:
+                if backup:
+                    _backup_file(fdcm)
+                _save_replace(ds, fdcm)
+            logger.debug("Successfully anonymized %s", fdcm)
             return True
         else:
-            logger.info(f"No tags to modify in {fdcm}")
+            logger.debug("No tags to modify in %s", fdcm)
             return False
             
     except Exception as e:
         logger.error(f"Failed to process {fdcm}: {e}")
         return False
     
-def modify_tag(root, tags, study_uid, newvalue):  
+def _validate_replacement(vr, value):
+    """Validate a replacement value with pydicom's writing validation mode."""
+    validate_value(vr, value, pydicom.config.settings.writing_validation_mode)
+
+def _set_value(elem, value):
+    """
+    Assign a replacement value to elem. The assignment itself only validates
+    with the (disabled) reading mode, so out-of-spec values such as an
+    over-long ID are still warned about (or rejected) here.
+    """
+    _validate_replacement(elem.VR, value)
+    elem.value = value
+
+PIXEL_DATA_TAG_LE = struct.pack('<HH', 0x7FE0, 0x0010)
+
+def _element_header(raw):
+    """Number of bytes (tag, VR, length) in front of a raw element's value."""
+    if not raw.is_implicit_VR and raw.VR in ('UC', 'UR', 'UT'):
+        return 12
+    return 8
+
+def _series_template(fdcm, compiled, newvalue, now):
+    """
+    Record where the first file of a series stores its anonymizable values,
+    so later slices sharing the same header layout can be patched without
+    being parsed. Must be called before fdcm itself is modified.
+
+    Returns:
+    - (checks, patches, absent, pixel_tell), or None if the file's values
+      cannot all be patched in place:
+      checks: (offset, bytes) element headers that must match in later files
+      patches: (value offset, length, VR, handler) slots to overwrite
+      absent: tag bytes of anonymizable tags the file does not contain
+      pixel_tell: offset of the PixelData tag (None if there is none)
+    """
+    try:
+        with open(fdcm, 'rb') as f:
+            ds = pydicom.dcmread(f, stop_before_pixels=True)
+            pixel_tell = f.tell()
+            f.seek(pixel_tell)
+            if f.read(4) != PIXEL_DATA_TAG_LE:
+                pixel_tell = None
+            
+            transfer_syntax = ds.file_meta.get('TransferSyntaxUID')
+            if (ds.preamble is None or transfer_syntax is None
+                    or not transfer_syntax.is_little_endian or transfer_syntax.is_deflated):
+                return None
+            if 'PatientID' not in ds or 'StudyInstanceUID' not in ds:
+                return None
+            
+            checks, patches, absent = [], [], []
+            # The validation tags must sit in the same place as well
+            # (recorded first, while they are still raw)
+            for keyword in ('PatientID', 'StudyInstanceUID'):
+                raw = ds.get_item(keyword)
+                if not isinstance(raw, RawDataElement):
+                    return None
+                header = _element_header(raw)
+                f.seek(raw.value_tell - header)
+                checks.append((raw.value_tell - header, f.read(header)))
+            
+            for itag, tag, handler in compiled:
+                if itag not in ds:
+                    absent.append(struct.pack('<HH', itag.group, itag.element))
+                    continue
+                raw = ds.get_item(itag)
+                if not isinstance(raw, RawDataElement):
+                    return None
+                elem = ds[itag]
+                old_value = elem.value
+                try:
+                    _set_value(elem, handler(now) if handler else newvalue)
+                except Exception:
+                    # modify_single_dcm leaves such a tag unchanged too
+                    continue
+                patch = _encode_patch(raw, old_value, elem)
+                if patch is None:
+                    return None
+                header = _element_header(raw)
+                f.seek(raw.value_tell - header)
+                checks.append((raw.value_tell - header, f.read(header)))
+                patches.append((raw.value_tell, raw.length, elem.VR, handler))
+    except Exception:
+        return None
+    
+    if not patches:
+        return None
+    return checks, patches, absent, pixel_tell
+
+def _apply_template(fdcm, template, newvalue, now):
+    """
+    Patch fdcm through a memory map using a template from _series_template.
+
+    The file is only touched when every recorded element header is found at
+    the same offset, the PixelData tag is where the template expects it, and
+    none of the tags absent from the template occurs in the header.
+
+    Returns:
+    - bool: True if the file was patched, False if it needs the full path.
+    """
+    checks, patches, absent, pixel_tell = template
+    try:
+        with open(fdcm, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mm:
+            for offset, header in checks:
+                if mm[offset:offset + len(header)] != header:
+                    return False
+            if pixel_tell is None:
+                header_end = len(mm)
+            elif mm[pixel_tell:pixel_tell + 4] == PIXEL_DATA_TAG_LE:
+                header_end = pixel_tell
+            else:
+                return False
+            if any(mm.find(tag_bytes, 0, header_end) != -1 for tag_bytes in absent):
+                return False
+            
+            # Values are regenerated per file, as in modify_single_dcm
+            values = []
+            for offset, length, vr, handler in patches:
+                value = handler(now) if handler else newvalue
+                _validate_replacement(vr, value)
+                encoded = ('' if value is None else str(value)).encode('ascii')
+                if len(encoded) > length:
+                    return False
+                values.append((offset, encoded.ljust(length, b' ')))
+            for offset, value in values:
+                mm[offset:offset + len(value)] = value
+            mm.flush()
+        return True
+    except (OSError, ValueError):
+        return False
+
+def modify_tag(root, tags, study_uid, newvalue, now=None):  
     """
     Safely modifies specified tags in all DICOM files within a study.
 
@@ -176,32 +635,39 @@ def modify_tag(root, tags, study_uid, newvalue):
     - tags: List of tags to be modified.
     - study_uid: Study instance UID.
     - newvalue: New value to be assigned to the tags.
+    - now: Reference time for generated dates (datetime.now() if None).
 
     Returns:
     - int: Number of successfully modified files
     """
     try:
+        if now is None:
+            now = datetime.now()
         study_path = os.path.join(root, study_uid)
         if not os.path.exists(study_path):
             logger.error(f"Study directory not found: {study_path}")
             return 0
             
-        series_uids = sorted(os.listdir(study_path))
+        # DirEntry caches the file type, so no extra stat per entry
+        with os.scandir(study_path) as entries:
+            series_paths = sorted(e.path for e in entries if e.is_dir())
+        compiled, _ = _compile_tags(tags)
         modified_count = 0
         
-        for series_uid in series_uids:
-            path_series = os.path.join(study_path, series_uid)
-            if not os.path.isdir(path_series):
-                continue
-                
-            alldcm = [fn for fn in os.listdir(path_series) if fn.endswith('.dcm')]
-            for sop in alldcm:
-                fdcm = os.path.join(path_series, sop)
-                if validate_dicom_file(fdcm):
-                    if modify_single_dcm(fdcm, tags, newvalue):
-                        modified_count += 1
-                else:
-                    logger.warning(f"Skipping invalid DICOM file: {fdcm}")
+        for path_series in series_paths:
+            with os.scandir(path_series) as entries:
+                alldcm = [e.path for e in entries
+                          if e.is_file(follow_symlinks=False) and e.name.endswith('.dcm')]
+            # Slices of a series usually share one header layout: learn it
+            # from the first file, then patch the rest without parsing them
+            template = _series_template(alldcm[0], compiled, newvalue, now) if alldcm else None
+            for fdcm in alldcm:
+                if (template is not None and fdcm != alldcm[0]
+                        and _apply_template(fdcm, template, newvalue, now)):
+                    logger.debug("Successfully anonymized %s", fdcm)
+                    modified_count += 1
+                elif modify_single_dcm(fdcm, tags, newvalue, now=now):
+                    modified_count += 1
         
         logger.info(f"Modified {modified_count} files in study {study_uid}")
         return modified_count
@@ -210,29 +676,35 @@ def modify_tag(root, tags, study_uid, newvalue):
         logger.error(f"Failed to modify study {study_uid}: {e}")
         return 0
 
-def anonymize_dicom_file(file_path, patient_id_prefix='ANON'):
+def anonymize_dicom_file(file_path, patient_id_prefix='ANON', backup=False, patient_id=None,
+                         original=None, now=None):
     """
     Complete anonymization of a single DICOM file following DICOM PS 3.15 standard.
 
     Args:
     - file_path: Path to the DICOM file
     - patient_id_prefix: Prefix for generated patient IDs
+    - backup: Keep the original as <file>.backup before saving
+    - patient_id: Pre-generated anonymous ID (generated from the prefix if None)
+    - original: Optional dict, filled with the old value of every modified tag
+    - now: Reference time for the ID and generated dates (datetime.now() if None)
 
     Returns:
     - bool: Success status
     """
     try:
-        if not validate_dicom_file(file_path):
-            return False
-            
         # Generate unique anonymous IDs
-        patient_id = generate_anonymous_id(patient_id_prefix)
+        if now is None:
+            now = datetime.now()
+        if patient_id is None:
+            patient_id = generate_anonymous_id(patient_id_prefix, today=now.strftime('%Y%m%d'))
         
         # Use complete tag list for full anonymization
-        success = modify_single_dcm(file_path, DICOM_TAGS_TO_ANONYMIZE, patient_id)
+        success = modify_single_dcm(file_path, DICOM_TAGS_TO_ANONYMIZE, patient_id, backup,
+                                    original, now)
         
         if success:
-            logger.info(f"Successfully anonymized {file_path} with ID {patient_id}")
+            logger.debug("Successfully anonymized %s with ID %s", file_path, patient_id)
         return success
         
     except Exception as e:
@@ -249,13 +721,15 @@ def modify_patientids_from_list():
         logger.error(f"Root directory not found: {root}")
         return
         
-    suids = [d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))]
+    with os.scandir(root) as entries:
+        suids = [e.name for e in entries if e.is_dir()]
     tags = DICOM_TAGS_TO_ANONYMIZE  # Use complete tag list
-    newvalue = generate_anonymous_id('BATCH')
+    now = datetime.now()
+    newvalue = generate_anonymous_id('BATCH', today=now.strftime('%Y%m%d'))
     
     total_modified = 0
     for suid in suids:
-        modified = modify_tag(root, tags, suid, newvalue)
+        modified = modify_tag(root, tags, suid, newvalue, now)
         total_modified += modified
         
     logger.info(f"Batch processing complete. Modified {total_modified} files total.")
@@ -273,23 +747,27 @@ def modify_patientids_from_xl():
         return
         
     try:
+        import pandas as pd
         df = pd.read_excel(excel_file, 'Tabelle1')
         tags = DICOM_TAGS_TO_ANONYMIZE
+        now = datetime.now()
         total_modified = 0
         
-        for i, row in df.iterrows():
+        # Pull the three columns once instead of building a Series per row
+        try:
+            olds = df['Old'].to_numpy()
+            news = df['New'].to_numpy()
+            suids = df['StudyInstanceUID'].to_numpy()
+        except KeyError as e:
+            logger.error(f"Missing required column in Excel file: {e}")
+            return
+        
+        for i, (oldvalue, newvalue, suid) in enumerate(zip(olds, news, suids)):
             try:
-                oldvalue = row['Old'] 
-                newvalue = row['New'] 
-                suid = row['StudyInstanceUID'] 
-                
-                modified = modify_tag(root, tags, suid, newvalue)
+                modified = modify_tag(root, tags, suid, newvalue, now)
                 total_modified += modified
                 logger.info(f"Processed study {suid}: {oldvalue} -> {newvalue}")
                 
-            except KeyError as e:
-                logger.error(f"Missing required column in Excel row {i}: {e}")
-                continue
             except Exception as e:
                 logger.error(f"Failed to process Excel row {i}: {e}")
                 continue
@@ -299,7 +777,48 @@ def modify_patientids_from_xl():
     except Exception as e:
         logger.error(f"Failed to read Excel file: {e}")
 
-def modify_patientids(directory_path, new_patientid=None):
+REPORT_HEADER = ['File_Path', 'Original_PatientID', 'Original_PatientName',
+                 'New_PatientID', 'Timestamp', 'Status']
+REPORT_BATCH = 1024
+
+def _report_row(file_path, new_patientid, success, original):
+    """Report row for one file, without the timestamp (added by the parent)."""
+    return (file_path, str(original.get('PatientID', 'N/A')),
+            str(original.get('PatientName', 'N/A')), new_patientid,
+            'Processed' if success else 'Failed')
+
+def _write_report(report_writer, rows):
+    """
+    Write worker report rows in batches of REPORT_BATCH, stamping each
+    batch with the time it was started.
+
+    Returns:
+    - int: Number of successfully processed files
+    """
+    processed = 0
+    batch = []
+    for file_path, old_pid, old_name, new_pid, status in rows:
+        if not batch:
+            ts_str = datetime.now().isoformat()
+        batch.append((file_path, old_pid, old_name, new_pid, ts_str, status))
+        processed += status == 'Processed'
+        if len(batch) >= REPORT_BATCH:
+            report_writer.writerows(batch)
+            batch = []
+    report_writer.writerows(batch)
+    return processed
+
+def _modify_patientid_one(task):
+    """Worker for modify_patientids: modify one file (and return its report row if asked)."""
+    file_path, new_patientid, report, now = task
+    if not report:
+        return modify_single_dcm(file_path, DICOM_TAGS_TO_ANONYMIZE, new_patientid, now=now)
+    original = {}
+    success = modify_single_dcm(file_path, DICOM_TAGS_TO_ANONYMIZE, new_patientid,
+                                original=original, now=now)
+    return _report_row(file_path, new_patientid, success, original)
+
+def modify_patientids(directory_path, new_patientid=None, report_writer=None):
     """
     Modifies patient identifiers in DICOM files within a directory.
     Enhanced with recursive processing and validation.
@@ -307,6 +826,7 @@ def modify_patientids(directory_path, new_patientid=None):
     Args:
     - directory_path: Path of the directory containing DICOM files.
     - new_patientid: New patient identifier to be assigned (auto-generated if None).
+    - report_writer: Optional csv.writer; receives one REPORT_HEADER row per file.
 
     Returns:
     - int: Number of successfully modified files
@@ -315,32 +835,48 @@ def modify_patientids(directory_path, new_patientid=None):
         logger.error(f"Directory not found: {directory_path}")
         return 0
         
+    now = datetime.now()
     if new_patientid is None:
-        new_patientid = generate_anonymous_id('DIR')
+        new_patientid = generate_anonymous_id('DIR', today=now.strftime('%Y%m%d'))
     
-    tags = DICOM_TAGS_TO_ANONYMIZE
-    total_modified = 0
-    
-    for root, dirs, files in os.walk(directory_path):
-        for file in files:
-            if file.endswith('.dcm'):
-                file_path = os.path.join(root, file)
-                if validate_dicom_file(file_path):
-                    if modify_single_dcm(file_path, tags, new_patientid):
-                        total_modified += 1
-                else:
-                    logger.warning(f"Skipping invalid DICOM file: {file_path}")
+    report = report_writer is not None
+    tasks = ((file_path, new_patientid, report, now)
+             for file_path in _iter_dcm_files(directory_path))
+    results = _parallel_map(_modify_patientid_one, tasks)
+    total_modified = _write_report(report_writer, results) if report else sum(results)
     
     logger.info(f"Directory processing complete. Modified {total_modified} files in {directory_path}")
     return total_modified
 
-def batch_anonymize_directory(source_dir, target_dir=None):
+def _batch_anonymize_one(task):
+    """
+    Worker for batch_anonymize_directory: optionally copy, then anonymize one
+    file (and return its report row if asked).
+    """
+    source_file, target_file, report, patient_id, now = task
+    original = {} if report else None
+    if target_file:
+        # Copy to target directory first
+        _makedirs_once(os.path.dirname(target_file))
+        _copy_file(source_file, target_file)
+        # The untouched source already serves as the backup
+        success = anonymize_dicom_file(target_file, patient_id=patient_id, original=original,
+                                       now=now)
+    else:
+        success = anonymize_dicom_file(source_file, backup=True, patient_id=patient_id,
+                                       original=original, now=now)
+    if not report:
+        return success
+    return _report_row(target_file or source_file, patient_id, success, original)
+
+def batch_anonymize_directory(source_dir, target_dir=None, report_writer=None):
     """
     Batch anonymize all DICOM files in a directory with option to copy to new location.
 
     Args:
     - source_dir: Source directory containing DICOM files
     - target_dir: Target directory (if None, modifies in-place)
+    - report_writer: Optional csv.writer; receives one REPORT_HEADER row per file
 
     Returns:
     - int: Number of successfully processed files
@@ -351,44 +887,64 @@ def batch_anonymize_directory(source_dir, target_dir=None):
         
     if target_dir and not os.path.exists(target_dir):
         os.makedirs(target_dir, exist_ok=True)
+    _made_dirs.clear()
     
-    processed_count = 0
+    report = report_writer is not None
+    now = datetime.now()
     
-    for root, dirs, files in os.walk(source_dir):
-        for file in files:
-            if file.endswith('.dcm'):
-                source_file = os.path.join(root, file)
-                
-                if target_dir:
-                    # Copy to target directory first
-                    rel_path = os.path.relpath(source_file, source_dir)
-                    target_file = os.path.join(target_dir, rel_path)
-                    os.makedirs(os.path.dirname(target_file), exist_ok=True)
-                    shutil.copy2(source_file, target_file)
-                    file_to_process = target_file
-                else:
-                    file_to_process = source_file
-                
-                if anonymize_dicom_file(file_to_process):
-                    processed_count += 1
+    def tasks():
+        # IDs are drawn in the parent, a block at a time
+        patient_ids = iter(())
+        today = now.strftime('%Y%m%d')
+        for source_file in _iter_dcm_files(source_dir):
+            if target_dir:
+                target_file = os.path.join(target_dir, os.path.relpath(source_file, source_dir))
+            else:
+                target_file = None
+            patient_id = next(patient_ids, None)
+            if patient_id is None:
+                patient_ids = iter(generate_anonymous_ids('ANON', 1024, today=today))
+                patient_id = next(patient_ids)
+            yield source_file, target_file, report, patient_id, now
+    
+    results = _parallel_map(_batch_anonymize_one, tasks())
+    processed_count = _write_report(report_writer, results) if report else sum(results)
     
     logger.info(f"Batch anonymization complete. Processed {processed_count} files.")
     return processed_count
 
-def view_as_blocks(array, block_shape):
-    """
-    View an array as non-overlapping blocks.
-
-    Args:
-    - array: Input array to be divided into blocks.
-    - block_shape: Shape of the blocks.
+def _copy_dicom_one(task):
+    """Worker for copy_dicoms: copy one file into the Study/Series/SOP layout."""
+    file_path, d2 = task
+    try:
+        # Only the identifiers are needed; the file itself is copied byte-wise
+        ds = pydicom.dcmread(file_path, stop_before_pixels=True,
+                             specific_tags=['PatientID', 'StudyInstanceUID',
+                                            'SeriesInstanceUID', 'SOPInstanceUID'])
+        
+        # Extract DICOM identifiers
+        patient_id = ds.get('PatientID', 'UNKNOWN_PATIENT')
+        study_instance_uid = ds.get('StudyInstanceUID', 'UNKNOWN_STUDY')
+        series_instance_uid = ds.get('SeriesInstanceUID', 'UNKNOWN_SERIES')
+        sop_instance_uid = ds.get('SOPInstanceUID', 'UNKNOWN_SOP')
+        
+        logger.debug("Processing: PatientID=%s, Study=%s, Series=%s, SOP=%s",
+                     patient_id, study_instance_uid, series_instance_uid, sop_instance_uid)
 
-    Returns:
-    - A 4D array where the first two dimensions index the blocks and the last two dimensions index within each block.
-    """
-    shape = (array.shape[0] // block_shape[0], array.shape[1] // block_shape[1]) + block_shape
-    strides = (block_shape[0] * array.strides[0], block_shape[1] * array.strides[1]) + array.strides
-    return np.lib.stride_tricks.as_strided(array, shape=shape, strides=strides)
+        # Create target path
+        dest_file = os.path.join(d2, study_instance_uid, series_instance_uid, sop_instance_uid + '.dcm')
+        
+        # Create directories if they don't exist
+        _makedirs_once(os.path.dirname(dest_file))
+        
+        # Copy file
+        _copy_file(file_path, dest_file)
+        logger.debug("Copied: %s -> %s", file_path, dest_file)
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to process DICOM file {file_path}: {e}")
+        return False
 
 def copy_dicoms(d1, d2):
     """
@@ -403,39 +959,9 @@ def copy_dicoms(d1, d2):
     - int: Number of successfully copied files
     """
     try:
-        copied_count = 0
-        
-        for root, dirs, files in os.walk(d1):
-            for file in files:
-                if file.endswith('.dcm'):
-                    file_path = os.path.join(root, file)
-                    
-                    try:
-                        ds = pydicom.dcmread(file_path)
-                        
-                        # Extract DICOM identifiers
-                        patient_id = ds.get('PatientID', 'UNKNOWN_PATIENT')
-                        study_instance_uid = ds.get('StudyInstanceUID', 'UNKNOWN_STUDY')
-                        series_instance_uid = ds.get('SeriesInstanceUID', 'UNKNOWN_SERIES')
-                        sop_instance_uid = ds.get('SOPInstanceUID', 'UNKNOWN_SOP')
-                        
-                        logger.info(f"Processing: PatientID={patient_id}, Study={study_instance_uid}, Series={series_instance_uid}, SOP={sop_instance_uid}")
-
-                        # Create target path
-                        src_file = os.path.join(root, file)                    
-                        dest_file = os.path.join(d2, study_instance_uid, series_instance_uid, sop_instance_uid + '.dcm')
-                        
-                        # Create directories if they don't exist
-                        os.makedirs(os.path.dirname(dest_file), exist_ok=True)
-                        
-                        # Copy file
-                        shutil.copy2(src_file, dest_file)
-                        copied_count += 1
-                        logger.debug(f"Copied: {src_file} -> {dest_file}")
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to process DICOM file {file_path}: {e}")
-                        continue
+        _made_dirs.clear()
+        tasks = ((file_path, d2) for file_path in _iter_dcm_files(d1))
+        copied_count = sum(_parallel_map(_copy_dicom_one, tasks))
                         
         logger.info(f"Copy operation complete. Successfully copied {copied_count} files.")
         return copied_count
@@ -446,44 +972,38 @@ def copy_dicoms(d1, d2):
 
 def generate_anonymization_report(directory_path, output_file='anonymization_report.csv'):
     """
-    Generate a CSV report of all anonymization actions performed.
+    Generate a CSV report of the DICOM files in a directory.
+    To report on an anonymization run itself, pass a csv.writer as
+    report_writer to batch_anonymize_directory or modify_patientids instead
+    of re-reading the files afterwards.
 
     Args:
     - directory_path: Directory containing DICOM files
     - output_file: Output CSV file path
     """
     try:
-        import csv
-        
         with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['File_Path', 'Original_PatientID', 'Original_PatientName', 
-                         'New_PatientID', 'Timestamp', 'Status']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+            writer = csv.writer(csvfile)
+            writer.writerow(REPORT_HEADER)
+            ts_str = datetime.now().isoformat()
             
-            for root, dirs, files in os.walk(directory_path):
-                for file in files:
-                    if file.endswith('.dcm'):
-                        file_path = os.path.join(root, file)
-                        try:
-                            ds = pydicom.dcmread(file_path)
-                            writer.writerow({
-                                'File_Path': file_path,
-                                'Original_PatientID': ds.get('PatientID', 'N/A'),
-                                'Original_PatientName': ds.get('PatientName', 'N/A'),
-                                'New_PatientID': ds.get('PatientID', 'N/A'),  # After anonymization
-                                'Timestamp': datetime.now().isoformat(),
-                                'Status': 'Processed'
-                            })
-                        except Exception as e:
-                            writer.writerow({
-                                'File_Path': file_path,
-                                'Original_PatientID': 'ERROR',
-                                'Original_PatientName': 'ERROR',
-                                'New_PatientID': 'ERROR',
-                                'Timestamp': datetime.now().isoformat(),
-                                'Status': f'Error: {e}'
-                            })
+            for file_path in _iter_dcm_files(directory_path):
+                try:
+                    ds = pydicom.dcmread(file_path, stop_before_pixels=True,
+                                         specific_tags=['PatientID', 'PatientName'])
+                    writer.writerow([
+                        file_path,
+                        ds.get('PatientID', 'N/A'),
+                        ds.get('PatientName', 'N/A'),
+                        ds.get('PatientID', 'N/A'),  # After anonymization
+                        ts_str,
+                        'Processed'
+                    ])
+                except Exception as e:
+                    writer.writerow([
+                        file_path, 'ERROR', 'ERROR', 'ERROR',
+                        ts_str, f'Error: {e}'
+                    ])
         
         logger.info(f"Anonymization report generated: {output_file}")
         